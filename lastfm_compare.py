@@ -1,5 +1,9 @@
 import sys
+import os
 import json
+import hashlib
+import signal
+import argparse
 import requests
 import time
 from collections import defaultdict
@@ -7,6 +11,10 @@ from difflib import SequenceMatcher
 from datetime import datetime, timedelta
 import io
 
+# Embedded Python ignores the script directory, so add it to find results_store
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import results_store
+
 # Configure stdout to handle Unicode properly on Windows
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -14,18 +22,69 @@ if sys.platform == 'win32':
 # Last.fm API - much faster than MusicBrainz
 LASTFM_API = 'https://ws.audioscrobbler.com/2.0/'
 
+parser = argparse.ArgumentParser(description='Compare a scanned music collection with Last.fm')
+parser.add_argument('scan_result', help='Path to the JSON produced by scan_music.py')
+parser.add_argument('api_key', nargs='?', help='Last.fm API key')
+parser.add_argument('--checkpoint', help='Path of the checkpoint journal used to make the run resumable')
+parser.add_argument('--resume', action='store_true', help='Skip artists already completed in the checkpoint journal')
+parser.add_argument('--checkpoint-every', type=int, default=10, help='Append to the checkpoint journal every N artists')
+parser.add_argument('--db', help='Store the results in this SQLite database and print only a summary')
+parser.add_argument('--priority', action='store_true', help='Process the most valuable artists first instead of in scan order')
+parser.add_argument('--budget-seconds', type=float, help='Stop starting new artists once this much wall-clock time has passed')
+parser.add_argument('--budget-calls', type=int, help='Stop starting new artists once this many Last.fm API calls were made')
+parser.add_argument('--history', help='JSON file recording when each artist was last compared, used by --priority')
+parser.add_argument('--batch', nargs='+', metavar='SCAN_RESULT', help='More scan results to compare in the same run, sharing one fetch and cache layer')
+parser.add_argument('--output-dir', help='With --batch, write each library\'s result to this directory instead of stdout')
+args = parser.parse_args()
+
+if args.batch and (args.checkpoint or args.resume or args.db):
+    parser.error('--checkpoint, --resume and --db apply to a single scan result and cannot be combined with --batch')
+if args.output_dir and not args.batch:
+    parser.error('--output-dir requires --batch')
+
 # Require Last.fm API key as argument
-if len(sys.argv) < 3:
+if not args.api_key:
     print('Error: Missing Last.fm API key. Please configure your API key in the application Settings.', file=sys.stderr)
     sys.exit(1)
 
-LASTFM_API_KEY = sys.argv[2]
+LASTFM_API_KEY = args.api_key
 
 # Simple cache
 artist_cache = {}
 album_cache = {}
 track_cache = {}
 
+# Last.fm requests made so far, for --budget-calls and the coverage report
+api_calls = 0
+# Requests that failed (network errors, rate limiting, server errors); their data is never cached
+failed_calls = 0
+# Consecutive artists whose requests failed before the run stops, assuming the network is down
+MAX_FAILED_ARTISTS = 3
+
+# Weights of the --priority score; each component is normalized to 0..1
+PRIORITY_WEIGHTS = {'tracks': 0.5, 'recency': 0.3, 'staleness': 0.2}
+# Artists last compared longer ago than this count as fully stale
+STALE_AFTER_DAYS = 30
+
+# Artists whose similar artists seed the recommendations
+RECOMMENDATION_SEEDS = 5
+# Worst-case Last.fm calls per seed: artist.getsimilar plus artist.search for up to 10 similar artists
+RECOMMENDATION_CALLS_PER_SEED = 11
+
+def lastfm_get(params):
+    """Call a Last.fm method and return its JSON, counting failed requests before re-raising."""
+    global api_calls, failed_calls
+    api_calls += 1
+    try:
+        r = requests.get(LASTFM_API, params=params, timeout=10)
+        # Rate limiting and server errors are transient, unlike e.g. an unknown artist
+        if r.status_code == 429 or r.status_code >= 500:
+            r.raise_for_status()
+        return r.json()
+    except (requests.RequestException, ValueError):
+        failed_calls += 1
+        raise
+
 def is_similar(str1, str2, threshold=0.8):
     """Check if two strings are similar using fuzzy matching"""
     return SequenceMatcher(None, str1.lower(), str2.lower()).ratio() > threshold
@@ -43,8 +102,7 @@ def get_artist_info(artist_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         artists = data.get('results', {}).get('artistmatches', {}).get('artist', [])
         
         if artists:
@@ -58,6 +116,7 @@ def get_artist_info(artist_name):
             return artists[0]
     except Exception as e:
         print(f"Error searching for artist {artist_name}: {e}", file=sys.stderr)
+        return None
     
     artist_cache[artist_name] = None
     return None
@@ -75,14 +134,12 @@ def get_artist_albums(artist_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         albums = data.get('topalbums', {}).get('album', [])
         album_cache[f"{artist_name}_albums"] = albums
         return albums
     except Exception as e:
         print(f"Error getting albums for {artist_name}: {e}", file=sys.stderr)
-        album_cache[f"{artist_name}_albums"] = []
         return []
 
 def get_artist_top_tracks(artist_name):
@@ -98,8 +155,7 @@ def get_artist_top_tracks(artist_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         tracks = data.get('toptracks', {}).get('track', [])
         album_cache[f"{artist_name}_tracks"] = tracks
         return tracks
@@ -109,6 +165,9 @@ def get_artist_top_tracks(artist_name):
 
 def get_artist_recent_tracks(artist_name):
     """Get recent tracks to catch newer releases"""
+    if f"{artist_name}_recent_tracks" in album_cache:
+        return album_cache[f"{artist_name}_recent_tracks"]
+    
     params = {
         'method': 'artist.gettoptracks',
         'artist': artist_name,
@@ -119,9 +178,9 @@ def get_artist_recent_tracks(artist_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         tracks = data.get('toptracks', {}).get('track', [])
+        album_cache[f"{artist_name}_recent_tracks"] = tracks
         return tracks
     except Exception as e:
         print(f"Error getting recent tracks for {artist_name}: {e}", file=sys.stderr)
@@ -141,15 +200,13 @@ def get_album_tracks(artist_name, album_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         tracks = data.get('album', {}).get('tracks', {}).get('track', [])
         track_names = [track['name'] for track in tracks] if tracks else []
         album_cache[cache_key] = track_names
         return track_names
     except Exception as e:
         print(f"Error getting tracks for {album_name}: {e}", file=sys.stderr)
-        album_cache[cache_key] = []
         return []
 
 def get_album_info_with_date(artist_name, album_name):
@@ -167,8 +224,7 @@ def get_album_info_with_date(artist_name, album_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         album_info = data.get('album', {})
         
         # Extract release date if available
@@ -194,15 +250,14 @@ def get_album_info_with_date(artist_name, album_name):
         return result
     except Exception as e:
         print(f"Error getting album info for {album_name}: {e}", file=sys.stderr)
-        result = {'tracks': [], 'release_date': None, 'release_year': None, 'playcount': '0'}
-        album_cache[cache_key] = result
-        return result
+        return {'tracks': [], 'release_date': None, 'release_year': None, 'playcount': '0'}
 
 def get_similar_artists(artist_name, limit=5):
     """Get similar artists from Last.fm."""
     cache_key = f"{artist_name}_similar"
     if cache_key in artist_cache:
         return artist_cache[cache_key]
+    failures = failed_calls
     
     params = {
         'method': 'artist.getsimilar',
@@ -213,8 +268,7 @@ def get_similar_artists(artist_name, limit=5):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         print(f"Similar artists API response for {artist_name}: {len(data.get('similarartists', {}).get('artist', []))} artists", file=sys.stderr)
         
         similar_artists = data.get('similarartists', {}).get('artist', [])
@@ -252,11 +306,12 @@ def get_similar_artists(artist_name, limit=5):
                 })
                 print(f"Added similar artist: {artist_name_similar} (similarity: {similarity})", file=sys.stderr)
         
-        artist_cache[cache_key] = processed_artists
+        # Artist lookups that failed left holes in the data, so only cache a clean result
+        if failed_calls == failures:
+            artist_cache[cache_key] = processed_artists
         return processed_artists
     except Exception as e:
         print(f"Error getting similar artists for {artist_name}: {e}", file=sys.stderr)
-        artist_cache[cache_key] = []
         return []
 
 def get_track_info(artist_name, track_name):
@@ -264,6 +319,7 @@ def get_track_info(artist_name, track_name):
     cache_key = f"{artist_name}_{track_name}_track_info"
     if cache_key in track_cache:
         return track_cache[cache_key]
+    failures = failed_calls
     
     params = {
         'method': 'track.getinfo',
@@ -274,8 +330,7 @@ def get_track_info(artist_name, track_name):
     }
     
     try:
-        r = requests.get(LASTFM_API, params=params, timeout=10)
-        data = r.json()
+        data = lastfm_get(params)
         track_info = data.get('track', {})
         
         release_year = None
@@ -319,13 +374,13 @@ def get_track_info(artist_name, track_name):
             'release_year': release_year,
             'album': album_name
         }
-        track_cache[cache_key] = result
+        # A failed album lookup means the release year may be missing, so only cache a clean result
+        if failed_calls == failures:
+            track_cache[cache_key] = result
         return result
     except Exception as e:
         print(f"Error getting track info for {artist_name} - {track_name}: {e}", file=sys.stderr)
-        result = {'release_year': None, 'album': 'Unknown'}
-        track_cache[cache_key] = result
-        return result
+        return {'release_year': None, 'album': 'Unknown'}
 
 def is_recent_release(release_date, months=6):
     """Check if a release date is within the specified number of months."""
@@ -334,26 +389,14 @@ def is_recent_release(release_date, months=6):
     cutoff_date = datetime.now() - timedelta(days=months * 30)
     return release_date >= cutoff_date
 
-if len(sys.argv) < 2:
-    print(json.dumps({'error': 'No scan result provided'}))
-    sys.exit(1)
-
-with open(sys.argv[1], 'r', encoding='utf-8') as f:
-    local_tracks = json.load(f)
-
-# Group local tracks by artist
-collection = defaultdict(list)
-for t in local_tracks:
-    collection[t['artist']].append(t)
+def compare_artist(artist, tracks):
+    """Compare one artist's local tracks with Last.fm and return everything missing.
 
-all_missing_tracks = []  # This will contain EVERYTHING missing
-processed_artists = 0
-total_artists = len(collection)
+    Only this artist's own results are consulted for de-duplication, so each
+    artist can be processed (and checkpointed) independently of the others.
+    """
+    missing_tracks = []
 
-for artist, tracks in collection.items():
-    processed_artists += 1
-    print(f"Processing artist {processed_artists}/{total_artists}: {artist} ({len(tracks)} local tracks)", file=sys.stderr)
-    
     # Check if artist exists
     artist_info = get_artist_info(artist)
     if not artist_info:
@@ -393,7 +436,7 @@ for artist, tracks in collection.items():
                     # Don't add if we already have this track locally
                     has_track = any(is_similar(track_name, local_track) for local_track in local_track_names)
                     if not has_track:
-                        all_missing_tracks.append({
+                        missing_tracks.append({
                             'artist': artist,
                             'album': album_name,
                             'track': track_name,
@@ -430,17 +473,14 @@ for artist, tracks in collection.items():
                             break
                 
                 # Only add if it's NOT already added as part of an album
-                already_added = any(
-                    t['artist'] == artist and is_similar(t['track'], track_name) 
-                    for t in all_missing_tracks
-                )
+                already_added = any(is_similar(t['track'], track_name) for t in missing_tracks)
                 
                 if not already_added:
                     # Try to get track-specific info for release year
                     track_details = get_track_info(artist, track_name)
                     track_release_year = track_details.get('release_year')
                     
-                    all_missing_tracks.append({
+                    missing_tracks.append({
                         'artist': artist,
                         'album': source_album,
                         'track': track_name,
@@ -461,10 +501,7 @@ for artist, tracks in collection.items():
             
             if not has_track:
                 # Check if already added
-                already_added = any(
-                    t['artist'] == artist and is_similar(t['track'], track_name) 
-                    for t in all_missing_tracks
-                )
+                already_added = any(is_similar(t['track'], track_name) for t in missing_tracks)
                 
                 if not already_added:
                     # Try to determine source album
@@ -483,7 +520,7 @@ for artist, tracks in collection.items():
                     track_details = get_track_info(artist, track_name)
                     track_release_year = track_details.get('release_year')
                     
-                    all_missing_tracks.append({
+                    missing_tracks.append({
                         'artist': artist,
                         'album': source_album,
                         'track': track_name,
@@ -492,150 +529,503 @@ for artist, tracks in collection.items():
                         'type': 'recent_single' if not is_from_known_album else 'album_track',
                         'playcount': playcount
                     })
+
+    return missing_tracks
+
+def collection_fingerprint(local_tracks):
+    """Identify a scan result so a checkpoint is never resumed against a different library."""
+    payload = json.dumps(local_tracks, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_checkpoint(path, fingerprint):
+    """Load completed artists from a checkpoint journal, or {} if it is missing or stale.
+
+    The journal is a header line with the collection fingerprint followed by one line per
+    completed artist. A line torn by a crash is cut off so later appends start cleanly.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    
+    completed = {}
+    valid_size = 0
+    try:
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('fingerprint') != fingerprint:
+                print("Checkpoint belongs to a different scan result, starting over", file=sys.stderr)
+                return {}
+            valid_size = f.tell()
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                for track in entry['missing_tracks']:
+                    # datetime is not JSON serializable, so release dates are journaled as ISO strings
+                    if track.get('release_date'):
+                        track['release_date'] = datetime.fromisoformat(track['release_date'])
+                completed[entry['artist']] = entry['missing_tracks']
+        if valid_size < os.path.getsize(path):
+            print(f"Dropping incomplete last entry of checkpoint {path}", file=sys.stderr)
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+    except (OSError, ValueError, AttributeError, KeyError) as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}", file=sys.stderr)
+        return {}
+    
+    return completed
+
+def start_checkpoint(path, fingerprint, total_artists):
+    """Atomically replace the checkpoint journal with an empty one for this scan result."""
+    header = {
+        'fingerprint': fingerprint,
+        'total_artists': total_artists,
+        'started_at': datetime.now().isoformat()
+    }
+    
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def append_checkpoint(path, artist_results, artists):
+    """Append newly completed artists to the checkpoint journal and flush it to disk."""
+    lines = []
+    for artist in artists:
+        missing_tracks = [
+            dict(track, release_date=track['release_date'].isoformat() if track['release_date'] else None)
+            for track in artist_results[artist]
+        ]
+        lines.append(json.dumps({'artist': artist, 'missing_tracks': missing_tracks}, ensure_ascii=False) + '\n')
+    
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_history(path):
+    """Load when each artist was last compared, or {} if there is no usable history."""
+    if not path or not os.path.exists(path):
+        return {}
     
-    # Count missing tracks for this artist
-    artist_missing_count = len([t for t in all_missing_tracks if t['artist'] == artist])
-    print(f"  → Found {artist_missing_count} missing tracks for {artist}", file=sys.stderr)
-    
-    # Rate limiting
-    time.sleep(0.1)
-
-# Now generate the three lists according to your requirements:
-
-# 1. Missing tracks: ALL missing tracks (no limit)
-missing_tracks = []
-for track in all_missing_tracks:
-    missing_tracks.append({
-        'artist': track['artist'],
-        'album': track['album'],
-        'track': track['track'],
-        'year': track['release_year']
-    })
-
-# 2. Popular albums: Most popular missing albums by playcount
-popular_albums = []
-album_tracks_map = {}
-
-# Group missing tracks by album
-for track in all_missing_tracks:
-    if track['type'] == 'album_track':
-        album_key = f"{track['artist']}|{track['album']}"
-        if album_key not in album_tracks_map:
-            album_tracks_map[album_key] = {
-                'artist': track['artist'],
-                'album': track['album'],
-                'release_date': track['release_date'],
-                'release_year': track['release_year'],
-                'playcount': track['playcount'],
-                'tracks': []
-            }
-        album_tracks_map[album_key]['tracks'].append(track['track'])
-
-# Filter albums by popularity (minimum playcount threshold)
-for album_info in album_tracks_map.values():
-    if album_info['playcount'] >= 10000:  # Only include reasonably popular albums
-        popular_albums.append({
-            'artist': album_info['artist'],
-            'album': album_info['album'],
-            'playcount': album_info['playcount'],
-            'year': album_info['release_year']
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable history {path}: {e}", file=sys.stderr)
+        return {}
+
+def save_history(path, history):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def priority_scores(collection, history):
+    """Score artists by local track count, how recently their files were added and how stale their last comparison is."""
+    if not collection:
+        return {}
+    
+    max_tracks = max(len(tracks) for tracks in collection.values())
+    # Scan results carry each file's modification time as a proxy for when it was added
+    newest_added = {artist: max(track.get('modified') or 0 for track in tracks) for artist, tracks in collection.items()}
+    oldest, newest = min(newest_added.values()), max(newest_added.values())
+    now = datetime.now()
+    
+    scores = {}
+    for artist, tracks in collection.items():
+        recency = (newest_added[artist] - oldest) / (newest - oldest) if newest > oldest else 0
+        
+        staleness = 1.0  # Never compared
+        if artist in history:
+            try:
+                age_days = (now - datetime.fromisoformat(history[artist])).total_seconds() / 86400
+                staleness = min(max(age_days / STALE_AFTER_DAYS, 0), 1.0)
+            except (TypeError, ValueError):
+                pass
+        
+        scores[artist] = (
+            PRIORITY_WEIGHTS['tracks'] * len(tracks) / max_tracks +
+            PRIORITY_WEIGHTS['recency'] * recency +
+            PRIORITY_WEIGHTS['staleness'] * staleness
+        )
+    return scores
+
+def exhausted_budget(budget, reserve_calls=0):
+    """Return which budget ran out ('time' or 'api_calls'), or None while there is budget left.
+
+    reserve_calls holds back room for that many more API calls; for the time budget
+    they are converted to seconds at the average call duration seen so far.
+    """
+    elapsed = time.monotonic() - budget['started_at']
+    if budget['seconds'] is not None:
+        reserve_seconds = elapsed / api_calls * reserve_calls if api_calls else 0
+        # Never reserve more than half the budget, so the artist loop always gets a share
+        if elapsed + min(reserve_seconds, budget['seconds'] / 2) >= budget['seconds']:
+            return 'time'
+    if budget['calls'] is not None:
+        if api_calls + min(reserve_calls, budget['calls'] // 2) >= budget['calls']:
+            return 'api_calls'
+    return None
+
+def build_result(collection, local_tracks, artist_results, artist_order, budget, budget_reason, failed_artists):
+    """Turn one library's per-artist comparisons into the result lists and coverage report.
+
+    budget_reason is why the artist loop stopped early, if it did; recommendations
+    are fetched within what is left of the budget. failed_artists are those whose
+    Last.fm requests failed, reported so the next run retries them.
+    """
+    # Rebuild the flat list in collection order so resumed runs match uninterrupted ones
+    all_missing_tracks = []  # This will contain EVERYTHING missing
+    for artist in collection:
+        all_missing_tracks.extend(artist_results.get(artist, []))
+    
+    # Now generate the three lists according to your requirements:
+
+    # 1. Missing tracks: ALL missing tracks (no limit)
+    missing_tracks = []
+    for track in all_missing_tracks:
+        missing_tracks.append({
+            'artist': track['artist'],
+            'album': track['album'],
+            'track': track['track'],
+            'playcount': track['playcount'],
+            'year': track['release_year']
         })
 
-# 3. Popular songs: Most popular missing singles by playcount
-popular_songs = []
-
-for track in all_missing_tracks:
-    if track['type'] in ['single', 'recent_single']:
-        # Filter by popularity (minimum playcount threshold)
-        if track['playcount'] >= 5000:  # Only include reasonably popular singles
-            popular_songs.append({
-                'artist': track['artist'],
-                'track': track['track'],
-                'playcount': track['playcount'],
-                'year': track['release_year']
+    # 2. Popular albums: Most popular missing albums by playcount
+    popular_albums = []
+    album_tracks_map = {}
+
+    # Group missing tracks by album
+    for track in all_missing_tracks:
+        if track['type'] == 'album_track':
+            album_key = f"{track['artist']}|{track['album']}"
+            if album_key not in album_tracks_map:
+                album_tracks_map[album_key] = {
+                    'artist': track['artist'],
+                    'album': track['album'],
+                    'release_date': track['release_date'],
+                    'release_year': track['release_year'],
+                    'playcount': track['playcount'],
+                    'tracks': []
+                }
+            album_tracks_map[album_key]['tracks'].append(track['track'])
+
+    # Filter albums by popularity (minimum playcount threshold)
+    for album_info in album_tracks_map.values():
+        if album_info['playcount'] >= 10000:  # Only include reasonably popular albums
+            popular_albums.append({
+                'artist': album_info['artist'],
+                'album': album_info['album'],
+                'playcount': album_info['playcount'],
+                'year': album_info['release_year']
             })
 
-# 4. Generate artist recommendations based on user's collection
-print("Generating artist recommendations...", file=sys.stderr)
-recommendations = []
-user_artists = set(collection.keys())
+    # 3. Popular songs: Most popular missing singles by playcount
+    popular_songs = []
+
+    for track in all_missing_tracks:
+        if track['type'] in ['single', 'recent_single']:
+            # Filter by popularity (minimum playcount threshold)
+            if track['playcount'] >= 5000:  # Only include reasonably popular singles
+                popular_songs.append({
+                    'artist': track['artist'],
+                    'track': track['track'],
+                    'playcount': track['playcount'],
+                    'year': track['release_year']
+                })
 
-# Get a sample of the user's most popular artists (to avoid too many API calls)
-sample_artists = list(collection.keys())[:5]  # Top 5 artists to start with
-print(f"Sample artists for recommendations: {sample_artists}", file=sys.stderr)
+    # 4. Generate artist recommendations based on user's collection
+    print("Generating artist recommendations...", file=sys.stderr)
+    recommendations = []
+    user_artists = set(collection.keys())
 
-for artist in sample_artists:
-    print(f"Getting similar artists for {artist}...", file=sys.stderr)
-    similar_artists = get_similar_artists(artist, limit=10)
-    print(f"Found {len(similar_artists)} similar artists for {artist}", file=sys.stderr)
+    # Get a sample of the user's most popular artists (to avoid too many API calls)
+    # Seeds come from collection order, not priority order, so a resumed run picks the same
+    # ones as an uninterrupted run; only compared artists qualify
+    sample_artists = [artist for artist in collection if artist in artist_results][:RECOMMENDATION_SEEDS]
+    print(f"Sample artists for recommendations: {sample_artists}", file=sys.stderr)
+    recommendations_skipped = False
+    failures = failed_calls
+
+    for artist in sample_artists:
+        exhausted = exhausted_budget(budget)
+        if exhausted:
+            budget_reason = budget_reason or exhausted
+            recommendations_skipped = True
+            print(f"Budget exhausted ({exhausted}), skipping remaining recommendations", file=sys.stderr)
+            break
+    
+        print(f"Getting similar artists for {artist}...", file=sys.stderr)
+        similar_artists = get_similar_artists(artist, limit=10)
+        print(f"Found {len(similar_artists)} similar artists for {artist}", file=sys.stderr)
     
-    for similar_artist in similar_artists:
-        artist_name = similar_artist['name']
-        print(f"Processing similar artist: {artist_name} (similarity: {similar_artist['similarity']})", file=sys.stderr)
+        for similar_artist in similar_artists:
+            artist_name = similar_artist['name']
+            print(f"Processing similar artist: {artist_name} (similarity: {similar_artist['similarity']})", file=sys.stderr)
         
-        # Only include artists the user doesn't already have
-        if artist_name.lower() not in [ua.lower() for ua in user_artists]:
-            # Check if we already have this recommendation
-            existing = next((r for r in recommendations if r['artist'].lower() == artist_name.lower()), None)
+            # Only include artists the user doesn't already have
+            if artist_name.lower() not in [ua.lower() for ua in user_artists]:
+                # Check if we already have this recommendation
+                existing = next((r for r in recommendations if r['artist'].lower() == artist_name.lower()), None)
             
-            if existing:
-                # If we already have this artist, increase the similarity score (weighted average)
-                existing['similarity'] = (existing['similarity'] + similar_artist['similarity']) / 2
-                existing['source_count'] += 1
-                print(f"Updated existing recommendation: {artist_name}", file=sys.stderr)
+                if existing:
+                    # If we already have this artist, increase the similarity score (weighted average)
+                    existing['similarity'] = (existing['similarity'] + similar_artist['similarity']) / 2
+                    existing['source_count'] += 1
+                    print(f"Updated existing recommendation: {artist_name}", file=sys.stderr)
+                else:
+                    # Add new recommendation
+                    recommendations.append({
+                        'artist': artist_name,
+                        'similarity': similar_artist['similarity'],
+                        'listeners': similar_artist['listeners'],
+                        'playcount': similar_artist['playcount'],
+                        'tags': similar_artist['tags'],
+                        'source_count': 1
+                    })
+                    print(f"Added new recommendation: {artist_name}", file=sys.stderr)
             else:
-                # Add new recommendation
-                recommendations.append({
-                    'artist': artist_name,
-                    'similarity': similar_artist['similarity'],
-                    'listeners': similar_artist['listeners'],
-                    'playcount': similar_artist['playcount'],
-                    'tags': similar_artist['tags'],
-                    'source_count': 1
-                })
-                print(f"Added new recommendation: {artist_name}", file=sys.stderr)
+                print(f"Skipping {artist_name} - already in user's collection", file=sys.stderr)
+    
+        # Rate limiting
+        time.sleep(0.2)
+
+    # Similar artists that failed to load would silently be missing from the recommendations
+    if failed_calls > failures:
+        recommendations_skipped = True
+        print("Some Last.fm requests failed, recommendations are incomplete", file=sys.stderr)
+
+    print(f"Total raw recommendations before filtering: {len(recommendations)}", file=sys.stderr)
+
+    # Filter and sort recommendations - make less restrictive
+    # Only include artists with some similarity (lowered threshold)
+    filtered_recommendations = [
+        r for r in recommendations 
+        if r['similarity'] > 0.1 and r['listeners'] > 1000  # Much lower thresholds
+    ]
+
+    print(f"Recommendations after filtering: {len(filtered_recommendations)}", file=sys.stderr)
+
+    # Sort by a combination of similarity and popularity
+    sorted_recommendations = sorted(
+        filtered_recommendations, 
+        key=lambda x: (x['similarity'] * 0.7 + (x['listeners'] / 1000000) * 0.3), 
+        reverse=True
+    )[:25]  # Top 25 recommendations
+
+    print(f"Final sorted recommendations: {len(sorted_recommendations)}", file=sys.stderr)
+
+    # Sort results
+    missing_tracks = sorted(missing_tracks, key=lambda x: x['artist'])  # NO LIMIT
+    popular_albums = sorted(popular_albums, key=lambda x: x['playcount'], reverse=True)
+    # Sort popular songs by playcount (most popular singles first)
+    popular_songs = sorted(popular_songs, key=lambda x: -x['playcount'])
+
+    print(f"Final results: {len(missing_tracks)} missing tracks, {len(popular_albums)} popular albums, {len(popular_songs)} popular songs, {len(sorted_recommendations)} recommendations", file=sys.stderr)
+    print(f"Popular albums are filtered by minimum 10K plays, popular songs are filtered by minimum 5K plays", file=sys.stderr)
+
+    # Coverage report, so partial (budgeted or resumed) results are explicit about what they include
+    pending_artists = [artist for artist in artist_order if artist not in artist_results]
+    failed = [artist for artist in failed_artists if artist in collection]
+    coverage = {
+        'complete': not pending_artists,
+        'budget_exhausted': budget_reason,
+        'recommendations_skipped': recommendations_skipped,
+        'artists_total': len(collection),
+        'artists_compared': len(collection) - len(pending_artists),
+        'artists_failed': len(failed),
+        'local_tracks_total': len(local_tracks),
+        'local_tracks_covered': sum(len(collection[artist]) for artist in artist_results),
+        'next_artists': pending_artists[:10],
+        'failed_artists': failed[:10]
+    }
+
+    result = {
+        'missing_tracks': missing_tracks,
+        'new_albums': popular_albums,
+        'new_songs': popular_songs,
+        'recommendations': sorted_recommendations,
+        'total_local_tracks': len(local_tracks),
+        'total_artists': len(collection),
+        'coverage': coverage
+    }
+    
+    return result
+
+def handle_termination(signum, frame):
+    # Treat SIGTERM (e.g. the app being closed) like Ctrl+C so progress gets journaled
+    raise KeyboardInterrupt
+
+signal.signal(signal.SIGTERM, handle_termination)
+
+# The first scan result plus any --batch ones; a normal run is a batch of one library
+library_paths = [args.scan_result] + (args.batch or [])
+libraries = []
+for path in library_paths:
+    with open(path, 'r', encoding='utf-8') as f:
+        local_tracks = json.load(f)
+    
+    # Group local tracks by artist
+    collection = defaultdict(list)
+    for t in local_tracks:
+        collection[t['artist']].append(t)
+    
+    libraries.append({'path': path, 'local_tracks': local_tracks, 'collection': collection, 'artist_results': {}})
+
+# Union of every library's artists. Remote data is fetched per distinct artist and kept in the
+# shared caches, so API calls scale with the number of distinct artists, not libraries.
+union = defaultdict(list)
+for library in libraries:
+    for artist, tracks in library['collection'].items():
+        union[artist].extend(tracks)
+
+total_artists = len(union)
+budget = {'started_at': time.monotonic(), 'seconds': args.budget_seconds, 'calls': args.budget_calls}
+# Budget the artist loop leaves over for each library's recommendation step
+recommendation_reserve = RECOMMENDATION_SEEDS * RECOMMENDATION_CALLS_PER_SEED * len(libraries)
+history = load_history(args.history)
+
+# Budgets only stop new artists from starting, so the most valuable ones should come first
+artist_order = list(union)
+if args.priority:
+    scores = priority_scores(union, history)
+    artist_order.sort(key=lambda artist: scores[artist], reverse=True)
+
+# Each library's own order, so its result (e.g. next_artists) matches a standalone run
+for library in libraries:
+    library['artist_order'] = list(library['collection'])
+    if args.priority:
+        library_scores = priority_scores(library['collection'], history)
+        library['artist_order'].sort(key=lambda artist: library_scores[artist], reverse=True)
+
+# Checkpoints are only supported for a single library (enforced when parsing arguments)
+fingerprint = collection_fingerprint(libraries[0]['local_tracks'])
+artist_results = libraries[0]['artist_results']
+
+# Missing tracks per artist; completed artists are restored from the checkpoint when resuming
+if args.resume:
+    artist_results.update(load_checkpoint(args.checkpoint, fingerprint))
+if artist_results:
+    print(f"Resuming from checkpoint: {len(artist_results)}/{total_artists} artists already completed", file=sys.stderr)
+
+# Every artist journaled from here on is appended, so each save costs only the new entries
+if args.checkpoint and not artist_results:
+    start_checkpoint(args.checkpoint, fingerprint, total_artists)
+
+processed_artists = 0
+compared_artists = 0
+unsaved_artists = []
+budget_reason = None
+# Artists whose Last.fm requests failed; they stay pending so a resumed run retries them
+failed_artists = []
+consecutive_failures = 0
+
+try:
+    for artist in artist_order:
+        processed_artists += 1
+        pending_libraries = [
+            library for library in libraries
+            if artist in library['collection'] and artist not in library['artist_results']
+        ]
+        if not pending_libraries:
+            print(f"Skipping artist {processed_artists}/{total_artists}: {artist} (completed in previous run)", file=sys.stderr)
+            compared_artists += 1
+            continue
+        
+        budget_reason = exhausted_budget(budget, reserve_calls=recommendation_reserve)
+        if budget_reason:
+            print(f"Budget exhausted ({budget_reason}), stopping with {compared_artists}/{total_artists} artists compared", file=sys.stderr)
+            break
+        
+        print(f"Processing artist {processed_artists}/{total_artists}: {artist} ({len(union[artist])} local tracks)", file=sys.stderr)
+        failures = failed_calls
+        missing = [compare_artist(artist, library['collection'][artist]) for library in pending_libraries]
+        
+        # A result built from failed requests would be incomplete, so never record it as compared
+        if failed_calls > failures:
+            failed_artists.append(artist)
+            consecutive_failures += 1
+            print(f"  → Last.fm requests for {artist} failed, leaving it for the next run", file=sys.stderr)
+            if consecutive_failures >= MAX_FAILED_ARTISTS:
+                print(f"Last.fm unreachable for {consecutive_failures} artists in a row, stopping with {compared_artists}/{total_artists} artists compared", file=sys.stderr)
+                break
+            continue
+        consecutive_failures = 0
+        
+        for library, tracks in zip(pending_libraries, missing):
+            library['artist_results'][artist] = tracks
+            source = f" in {library['path']}" if len(libraries) > 1 else ''
+            print(f"  → Found {len(tracks)} missing tracks for {artist}{source}", file=sys.stderr)
+        history[artist] = datetime.now().isoformat()
+        compared_artists += 1
+        
+        if artist in artist_results:
+            unsaved_artists.append(artist)
+        if args.checkpoint and len(unsaved_artists) >= args.checkpoint_every:
+            append_checkpoint(args.checkpoint, artist_results, unsaved_artists)
+            unsaved_artists = []
+        
+        # Rate limiting
+        time.sleep(0.1)
+except KeyboardInterrupt:
+    if args.history:
+        save_history(args.history, history)
+    if args.checkpoint:
+        append_checkpoint(args.checkpoint, artist_results, unsaved_artists)
+        print(f"Interrupted, progress saved to {args.checkpoint} ({len(artist_results)}/{total_artists} artists)", file=sys.stderr)
+    sys.exit(130)
+
+# Journal the finished loop too, so a failure during recommendations does not redo it
+if args.checkpoint and unsaved_artists:
+    append_checkpoint(args.checkpoint, artist_results, unsaved_artists)
+if args.history:
+    save_history(args.history, history)
+
+if args.batch:
+    # One result per library, all matched against the same fetched data. The budget is shared,
+    # so API calls and elapsed time are reported once for the whole batch.
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    batch_summary = []
+    for index, library in enumerate(libraries):
+        print(f"Building results for {library['path']}...", file=sys.stderr)
+        result = build_result(library['collection'], library['local_tracks'], library['artist_results'], library['artist_order'], budget, budget_reason, failed_artists)
+        entry = {'scan_result': library['path']}
+        if args.output_dir:
+            name = os.path.splitext(os.path.basename(library['path']))[0]
+            entry['output'] = os.path.join(args.output_dir, f"{index + 1:02d}_{name}.json")
+            with open(entry['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            entry.update(results_store.summarize(result))
         else:
-            print(f"Skipping {artist_name} - already in user's collection", file=sys.stderr)
-    
-    # Rate limiting
-    time.sleep(0.2)
-
-print(f"Total raw recommendations before filtering: {len(recommendations)}", file=sys.stderr)
-
-# Filter and sort recommendations - make less restrictive
-# Only include artists with some similarity (lowered threshold)
-filtered_recommendations = [
-    r for r in recommendations 
-    if r['similarity'] > 0.1 and r['listeners'] > 1000  # Much lower thresholds
-]
-
-print(f"Recommendations after filtering: {len(filtered_recommendations)}", file=sys.stderr)
-
-# Sort by a combination of similarity and popularity
-sorted_recommendations = sorted(
-    filtered_recommendations, 
-    key=lambda x: (x['similarity'] * 0.7 + (x['listeners'] / 1000000) * 0.3), 
-    reverse=True
-)[:25]  # Top 25 recommendations
-
-print(f"Final sorted recommendations: {len(sorted_recommendations)}", file=sys.stderr)
-
-# Sort results
-missing_tracks = sorted(missing_tracks, key=lambda x: x['artist'])  # NO LIMIT
-popular_albums = sorted(popular_albums, key=lambda x: x['playcount'], reverse=True)
-# Sort popular songs by playcount (most popular singles first)
-popular_songs = sorted(popular_songs, key=lambda x: -x['playcount'])
-
-print(f"Final results: {len(missing_tracks)} missing tracks, {len(popular_albums)} popular albums, {len(popular_songs)} popular songs, {len(sorted_recommendations)} recommendations", file=sys.stderr)
-print(f"Popular albums are filtered by minimum 10K plays, popular songs are filtered by minimum 5K plays", file=sys.stderr)
-
-result = {
-    'missing_tracks': missing_tracks,
-    'new_albums': popular_albums,
-    'new_songs': popular_songs,
-    'recommendations': sorted_recommendations,
-    'total_local_tracks': len(local_tracks),
-    'total_artists': len(collection)
-}
-
-print(json.dumps(result, ensure_ascii=False, indent=2)) 
\ No newline at end of file
+            entry['result'] = result
+        batch_summary.append(entry)
+    
+    print(json.dumps({
+        'libraries': batch_summary,
+        'distinct_artists': total_artists,
+        'api_calls': api_calls,
+        'elapsed_seconds': round(time.monotonic() - budget['started_at'], 1)
+    }, ensure_ascii=False, indent=2))
+    sys.exit(0)
+
+result = build_result(libraries[0]['collection'], libraries[0]['local_tracks'], artist_results, libraries[0]['artist_order'], budget, budget_reason, failed_artists)
+coverage = result['coverage']
+coverage['api_calls'] = api_calls
+coverage['elapsed_seconds'] = round(time.monotonic() - budget['started_at'], 1)
+
+if args.db:
+    # The renderer pages through the database instead of receiving every row over IPC
+    results_store.save_results(args.db, result)
+    print(json.dumps(results_store.summarize(result), ensure_ascii=False, indent=2))
+else:
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+# Once every artist is compared there is nothing left to resume
+if coverage['complete'] and args.checkpoint and os.path.exists(args.checkpoint):
+    os.remove(args.checkpoint) 
\ No newline at end of file
@@ -3,6 +3,7 @@ const path = require('path');
 const { spawn } = require('child_process');
 const fs = require('fs');
 const os = require('os');
+const crypto = require('crypto');
 
 let mainWindow;
 
@@ -252,9 +253,83 @@ ipcMain.handle('select-folder-and-scan', async () => {
   });
 });
 
-ipcMain.handle('compareWithLastFM', async (event, scanResult, apiKey) => {
+// Checkpoint journals that make Last.fm comparisons resumable, one per scan result
+const checkpointDir = path.join(os.homedir(), '.music-scan-pro-checkpoints');
+
+function getCheckpointPath(scanResult) {
+  const hash = crypto.createHash('sha256').update(JSON.stringify(scanResult)).digest('hex').slice(0, 16);
+  return path.join(checkpointDir, `compare_${hash}.jsonl`);
+}
+
+// Checkpoints older than this are not offered for resume, and untouched ones of other scan results get pruned
+const CHECKPOINT_MAX_AGE_MS = 14 * 24 * 60 * 60 * 1000;
+
+// Remove stale checkpoints (and leftover temp files) of other scan results
+function pruneCheckpoints(keepPath) {
+  const now = Date.now();
+  for (const name of fs.readdirSync(checkpointDir)) {
+    const filePath = path.join(checkpointDir, name);
+    if (filePath === keepPath || !name.startsWith('compare_')) continue;
+    try {
+      if (now - fs.statSync(filePath).mtimeMs > CHECKPOINT_MAX_AGE_MS) {
+        fs.unlinkSync(filePath);
+        console.log(`🧹 Removed stale checkpoint: ${filePath}`);
+      }
+    } catch (error) {
+      console.error('❌ Failed to prune checkpoint:', error.message);
+    }
+  }
+}
+
+// Ask the user whether to continue an incomplete run left behind for this scan result
+async function shouldResumeCompare(checkpointPath) {
+  if (!fs.existsSync(checkpointPath)) return false;
+
+  // The journal is a header line followed by one line per completed artist
+  let header;
+  let completedArtists;
+  try {
+    const lines = fs.readFileSync(checkpointPath, 'utf-8').split('\n').filter((line) => line.trim());
+    header = JSON.parse(lines[0]);
+    completedArtists = lines.length - 1;
+  } catch (error) {
+    console.error('❌ Ignoring unreadable checkpoint:', error.message);
+    return false;
+  }
+
+  // Results fetched this long ago are too stale to merge with fresh ones
+  const startedAt = Date.parse(header.started_at) || fs.statSync(checkpointPath).mtimeMs;
+  if (Date.now() - startedAt > CHECKPOINT_MAX_AGE_MS) {
+    fs.unlinkSync(checkpointPath);
+    console.log(`🧹 Removed stale checkpoint: ${checkpointPath}`);
+    return false;
+  }
+
+  const { response } = await dialog.showMessageBox(mainWindow, {
+    type: 'question',
+    buttons: ['Resume', 'Start Over'],
+    defaultId: 0,
+    cancelId: 1,
+    title: 'Resume Last.fm Analysis',
+    message: 'An unfinished Last.fm analysis was found for this collection.',
+    detail: `${completedArtists} of ${header.total_artists} artists were already analyzed. Resume where it stopped, or start over?`,
+  });
+  return response === 0;
+}
+
+// Indexed SQLite store of the latest Last.fm comparison, queried page by page by the renderer
+const resultsDbPath = path.join(os.homedir(), '.music-scan-pro-results.sqlite');
+
+// When each artist was last compared, so budgeted runs start with the stalest artists
+const compareHistoryPath = path.join(os.homedir(), '.music-scan-pro-history.json');
+
+ipcMain.handle('compareWithLastFM', async (event, scanResult, apiKey, options = {}) => {
   const tmpPath = path.join(os.tmpdir(), `music_scan_${Date.now()}.json`);
   fs.writeFileSync(tmpPath, JSON.stringify(scanResult, null, 2), 'utf-8');
+  fs.mkdirSync(checkpointDir, { recursive: true });
+  const checkpointPath = getCheckpointPath(scanResult);
+  pruneCheckpoints(checkpointPath);
+  const resume = await shouldResumeCompare(checkpointPath);
   return new Promise((resolve) => {
     const scriptPath = getPythonScriptPath('lastfm_compare.py');
     const pythonExe = getPythonExecutable();
@@ -262,6 +337,14 @@ ipcMain.handle('compareWithLastFM', async (event, scanResult, apiKey) => {
     if (apiKey) {
       args.push(apiKey);
     }
+    args.push('--checkpoint', checkpointPath, '--db', resultsDbPath, '--history', compareHistoryPath);
+    if (options.budgetMinutes > 0) {
+      // Compare the most valuable artists first and return a partial result when time runs out
+      args.push('--priority', '--budget-seconds', String(options.budgetMinutes * 60));
+    }
+    if (resume) {
+      args.push('--resume');
+    }
     
     console.log(`🐍 Running Last.fm comparison: ${pythonExe} ${args.join(' ')}`);
     const py = spawn(pythonExe, args, { env: process.env });
@@ -300,6 +383,34 @@ ipcMain.handle('compareWithLastFM', async (event, scanResult, apiKey) => {
   });
 });
 
+// IPC: Query the stored comparison results (filter, sort, group, page)
+ipcMain.handle('queryResults', async (event, query) => {
+  return new Promise((resolve) => {
+    const scriptPath = getPythonScriptPath('results_store.py');
+    const pythonExe = getPythonExecutable();
+    const py = spawn(pythonExe, [scriptPath, resultsDbPath, JSON.stringify(query)], { env: process.env });
+    let data = '';
+    let err = '';
+
+    py.on('error', (error) => {
+      console.error('❌ Failed to spawn Python process:', error.message);
+      resolve({ error: `Failed to start Python: ${error.message}` });
+    });
+
+    py.stdout.on('data', (chunk) => { data += chunk; });
+    py.stderr.on('data', (chunk) => { err += chunk; });
+    py.on('close', (code) => {
+      try {
+        const result = JSON.parse(data.trim());
+        resolve(result.error ? { error: result.error } : { result });
+      } catch (parseError) {
+        console.error('❌ Results query failed:', err || parseError.message);
+        resolve({ error: 'Failed to query results: ' + (err || parseError.message), exitCode: code });
+      }
+    });
+  });
+});
+
 // Settings management
 const settingsPath = path.join(os.homedir(), '.music-scan-pro-settings.json');
 
@@ -2,7 +2,8 @@ const { contextBridge, ipcRenderer } = require('electron');
 
 contextBridge.exposeInMainWorld('electronAPI', {
   selectFolderAndScan: () => ipcRenderer.invoke('select-folder-and-scan'),
-  compareWithLastFM: (scanResult, apiKey) => ipcRenderer.invoke('compareWithLastFM', scanResult, apiKey),
+  compareWithLastFM: (scanResult, apiKey, options) => ipcRenderer.invoke('compareWithLastFM', scanResult, apiKey, options),
+  queryResults: (query) => ipcRenderer.invoke('queryResults', query),
 
   getSettings: () => ipcRenderer.invoke('getSettings'),
   saveSettings: (settings) => ipcRenderer.invoke('saveSettings', settings),
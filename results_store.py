@@ -0,0 +1,274 @@
+import sys
+import os
+import json
+import sqlite3
+import io
+
+# Configure stdout to handle Unicode properly on Windows
+if sys.platform == 'win32' and __name__ == '__main__':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# Columns of each result list. Only these names are ever interpolated into SQL,
+# so filters and sort fields coming from the renderer are checked against them.
+TABLES = {
+    'missing_tracks': ['artist', 'album', 'track', 'playcount', 'year'],
+    'new_albums': ['artist', 'album', 'playcount', 'year'],
+    'new_songs': ['artist', 'track', 'playcount', 'year'],
+    'recommendations': ['artist', 'similarity', 'listeners', 'playcount', 'tags', 'image'],
+}
+
+# Order each list had in the original JSON payload
+DEFAULT_SORT = {
+    'missing_tracks': ('artist', 'asc'),
+    'new_albums': ('playcount', 'desc'),
+    'new_songs': ('playcount', 'desc'),
+    'recommendations': ('id', 'asc'),
+}
+
+SCHEMA = """
+CREATE TABLE missing_tracks (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    album TEXT,
+    track TEXT NOT NULL,
+    playcount INTEGER NOT NULL,
+    year INTEGER
+);
+CREATE INDEX idx_missing_tracks_artist_album ON missing_tracks (artist, album);
+CREATE INDEX idx_missing_tracks_album ON missing_tracks (album);
+CREATE INDEX idx_missing_tracks_playcount ON missing_tracks (playcount);
+CREATE INDEX idx_missing_tracks_year ON missing_tracks (year);
+
+CREATE TABLE new_albums (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    album TEXT NOT NULL,
+    playcount INTEGER NOT NULL,
+    year INTEGER
+);
+CREATE INDEX idx_new_albums_artist ON new_albums (artist);
+CREATE INDEX idx_new_albums_playcount ON new_albums (playcount);
+CREATE INDEX idx_new_albums_year ON new_albums (year);
+
+CREATE TABLE new_songs (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    track TEXT NOT NULL,
+    playcount INTEGER NOT NULL,
+    year INTEGER
+);
+CREATE INDEX idx_new_songs_artist ON new_songs (artist);
+CREATE INDEX idx_new_songs_playcount ON new_songs (playcount);
+CREATE INDEX idx_new_songs_year ON new_songs (year);
+
+CREATE TABLE recommendations (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    listeners INTEGER NOT NULL,
+    playcount INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    image TEXT
+);
+
+CREATE TABLE summary (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def summarize(result):
+    """Counts and totals the dashboard needs before it fetches any rows."""
+    return {
+        'counts': {table: len(result.get(table) or []) for table in TABLES},
+        'total_local_tracks': result['total_local_tracks'],
+        'total_artists': result['total_artists'],
+        'coverage': result.get('coverage')
+    }
+
+def save_results(db_path, result):
+    """Write a compare result into a fresh SQLite database at db_path."""
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        for table, columns in TABLES.items():
+            rows = []
+            for item in result.get(table) or []:
+                row = [item.get(column) for column in columns]
+                if table == 'recommendations':
+                    row[columns.index('tags')] = json.dumps(item.get('tags', []), ensure_ascii=False)
+                rows.append(row)
+            placeholders = ', '.join('?' for _ in columns)
+            conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+        # Values are stored as JSON so the coverage report fits alongside the totals
+        summary = summarize(result)
+        conn.executemany("INSERT INTO summary (key, value) VALUES (?, ?)", [
+            (key, json.dumps(summary[key], ensure_ascii=False))
+            for key in ('total_local_tracks', 'total_artists', 'coverage')
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Swap in the new database only once it is complete
+    os.replace(tmp_path, db_path)
+
+def get_summary(conn):
+    stored = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM summary").fetchall()}
+    return {
+        'counts': {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES},
+        'total_local_tracks': stored.get('total_local_tracks', 0),
+        'total_artists': stored.get('total_artists', 0),
+        'coverage': stored.get('coverage')
+    }
+
+def build_where(table, filters):
+    """Translate a filter dict into a WHERE clause and its parameters."""
+    columns = TABLES[table]
+    clauses = []
+    params = []
+
+    for column in ('artist', 'album'):
+        if filters.get(column) is not None and column in columns:
+            clauses.append(f"{column} = ?")
+            params.append(filters[column])
+
+    if filters.get('year_from') is not None and 'year' in columns:
+        clauses.append("year >= ?")
+        params.append(filters['year_from'])
+    if filters.get('year_to') is not None and 'year' in columns:
+        clauses.append("year <= ?")
+        params.append(filters['year_to'])
+    if filters.get('min_playcount') is not None and 'playcount' in columns:
+        clauses.append("playcount >= ?")
+        params.append(filters['min_playcount'])
+
+    if filters.get('search'):
+        searchable = [column for column in ('artist', 'album', 'track') if column in columns]
+        clauses.append('(' + ' OR '.join(f"{column} LIKE ?" for column in searchable) + ')')
+        params.extend([f"%{filters['search']}%"] * len(searchable))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    return where, params
+
+def row_to_dict(table, row):
+    item = dict(row)
+    if table == 'recommendations':
+        item['tags'] = json.loads(item['tags'])
+    return item
+
+def query_results(conn, query):
+    """Run a filtered, sorted and paginated query against one result list.
+
+    query keys: table, filter, sort, order, group_by, page (0-based), page_size.
+    Without group_by, rows are paged. With group_by, whole groups are paged so an
+    artist is never split across pages.
+    """
+    if not isinstance(query, dict):
+        raise ValueError("Query must be a JSON object")
+    table = query.get('table')
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    columns = TABLES[table]
+
+    default_sort, default_order = DEFAULT_SORT[table]
+    sort = query.get('sort') or default_sort
+    order = (query.get('order') or default_order).lower()
+    if sort not in columns and sort != 'id':
+        raise ValueError(f"Cannot sort {table} by {sort}")
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"Invalid sort order: {order}")
+
+    # Album names are only unique per artist (and every artist has "Popular Single"),
+    # so albums are grouped client-side within an artist group instead
+    group_by = query.get('group_by')
+    if group_by is not None and group_by != 'artist':
+        raise ValueError(f"Cannot group {table} by {group_by}")
+
+    page = max(int(query.get('page', 0)), 0)
+    page_size = int(query.get('page_size', 50))
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+
+    filters = query.get('filter') or {}
+    if not isinstance(filters, dict):
+        raise ValueError("filter must be a JSON object")
+    where, params = build_where(table, filters)
+    # id keeps ties in their original insertion order
+    order_by = f"{sort} {order.upper()}, id ASC"
+    total = conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+
+    if group_by is None:
+        rows = conn.execute(
+            f"SELECT * FROM {table} {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size]
+        ).fetchall()
+        return {
+            'rows': [row_to_dict(table, row) for row in rows],
+            'total': total,
+            'page': page,
+            'page_size': page_size
+        }
+
+    # Groups are ordered by the best row they contain under the requested sort
+    group_sort = group_by if sort == group_by else f"{'MAX' if order == 'desc' else 'MIN'}({sort})"
+    total_groups = conn.execute(f"SELECT COUNT(DISTINCT {group_by}) FROM {table} {where}", params).fetchone()[0]
+    group_rows = conn.execute(
+        f"SELECT {group_by}, COUNT(*) FROM {table} {where} GROUP BY {group_by} "
+        f"ORDER BY {group_sort} {order.upper()}, MIN(id) ASC LIMIT ? OFFSET ?",
+        params + [page_size, page * page_size]
+    ).fetchall()
+
+    groups = [{'key': key, 'count': count, 'rows': []} for key, count in group_rows]
+    if groups:
+        by_key = {group['key']: group for group in groups}
+        group_where = f"{where} AND" if where else "WHERE"
+        placeholders = ', '.join('?' for _ in groups)
+        rows = conn.execute(
+            f"SELECT * FROM {table} {group_where} {group_by} IN ({placeholders}) ORDER BY {order_by}",
+            params + list(by_key)
+        ).fetchall()
+        for row in rows:
+            by_key[row[group_by]]['rows'].append(row_to_dict(table, row))
+
+    return {
+        'groups': groups,
+        'total_groups': total_groups,
+        'total': total,
+        'page': page,
+        'page_size': page_size
+    }
+
+def open_results(db_path):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No analysis results at {db_path}")
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+if __name__ == '__main__':
+    # Usage: results_store.py DB_PATH '{"table": "missing_tracks", ...}'
+    #        results_store.py DB_PATH summary
+    if len(sys.argv) < 3:
+        print(json.dumps({'error': 'Usage: results_store.py DB_PATH QUERY_JSON|summary'}))
+        sys.exit(1)
+
+    try:
+        conn = open_results(sys.argv[1])
+        try:
+            if sys.argv[2] == 'summary':
+                output = get_summary(conn)
+            else:
+                output = query_results(conn, json.loads(sys.argv[2]))
+        finally:
+            conn.close()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(json.dumps({'error': str(e)}))
+        sys.exit(1)
+
+    print(json.dumps(output, ensure_ascii=False))
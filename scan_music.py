@@ -94,7 +94,8 @@ for dirpath, _, filenames in os.walk(dir):
                     'album': album.strip(),
                     'track': title.strip(),
                     'filename': fname,
-                    'path': os.path.relpath(full_path, dir)
+                    'path': os.path.relpath(full_path, dir),
+                    'modified': os.path.getmtime(full_path)
                 })
 
 # Set stdout encoding to utf-8 for Windows
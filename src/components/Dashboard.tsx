@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Track, LastFMComparison, Settings } from '@/types';
+import { Track, ComparisonSummary, ResultsQuery, ResultsPage, ResultsGroup, ResultTable, MissingTrack, PopularAlbum, PopularSong, ArtistRecommendation, Settings } from '@/types';
 import { Music, Album, User, Search, ExternalLink, Settings as SettingsIcon, Play, Download } from 'lucide-react';
 import Image from 'next/image';
 import LoadingSpinner from './LoadingSpinner';
@@ -7,6 +7,18 @@ import SettingsModal from './Settings';
 import jsPDF from 'jspdf';
 import autoTable from 'jspdf-autotable';
 
+type ResultsTab = 'missing' | 'albums' | 'songs' | 'recommendations';
+
+// Query behind each results tab; grouped tabs page by artist so an artist is never split
+const TAB_QUERIES: Record<ResultsTab, ResultsQuery> = {
+  missing: { table: 'missing_tracks', group_by: 'artist' },
+  albums: { table: 'new_albums', group_by: 'artist' },
+  songs: { table: 'new_songs', group_by: 'artist' },
+  recommendations: { table: 'recommendations' },
+};
+
+const PAGE_SIZE = 25;
+
 interface DashboardProps {
   scanResult: Track[];
   onAnalyze: () => void;
@@ -15,13 +27,15 @@ interface DashboardProps {
 }
 
 const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned = false, error: propError = null }) => {
-  const [comparison, setComparison] = useState<LastFMComparison | null>(null);
+  const [comparison, setComparison] = useState<ComparisonSummary | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(propError);
-  const [activeTab, setActiveTab] = useState<'overview' | 'missing' | 'albums' | 'songs' | 'recommendations'>('overview');
+  const [activeTab, setActiveTab] = useState<'overview' | ResultsTab>('overview');
   const [showSettings, setShowSettings] = useState(false);
   const [settings, setSettings] = useState<Settings>({});
   const [savedKey, setSavedKey] = useState(false);
+  const [page, setPage] = useState(0);
+  const [resultsPage, setResultsPage] = useState<ResultsPage<unknown> | null>(null);
 
   const stats = {
     totalTracks: scanResult.length,
@@ -35,6 +49,33 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
 
   // Remove auto-analysis - user will trigger manually
 
+  // Fetch only the visible page of the active results tab
+  useEffect(() => {
+    if (!comparison || activeTab === 'overview') {
+      setResultsPage(null);
+      return;
+    }
+
+    let cancelled = false;
+    setResultsPage(null);
+    window.electronAPI.queryResults<unknown>({ ...TAB_QUERIES[activeTab], page, page_size: PAGE_SIZE })
+      .then((response) => {
+        if (cancelled) return;
+        if (response.error) {
+          setError(response.error);
+        } else if (response.result) {
+          setResultsPage(response.result);
+        }
+      })
+      .catch(() => {
+        if (!cancelled) setError('Failed to load results');
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [comparison, activeTab, page]);
+
   const LastFMLoadingSpinner: React.FC = () => {
     const [currentMessageIndex, setCurrentMessageIndex] = useState(0);
     
@@ -135,11 +176,14 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
     setError(null);
 
     try {
-      const result = await window.electronAPI.compareWithLastFM(scanResult, settings.lastfmApiKey);
+      const result = await window.electronAPI.compareWithLastFM(scanResult, settings.lastfmApiKey, {
+        budgetMinutes: settings.compareBudgetMinutes,
+      });
       
       if (result.error) {
         setError(result.error);
       } else if (result.result) {
+        setPage(0);
         setComparison(result.result);
       }
     } catch (err) {
@@ -149,6 +193,11 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
     }
   };
 
+  const selectTab = (tab: 'overview' | ResultsTab) => {
+    setActiveTab(tab);
+    setPage(0);
+  };
+
   const handleSettingsSave = (newSettings: Settings) => {
     setSettings(newSettings);
     if (newSettings.lastfmApiKey) {
@@ -157,6 +206,17 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
     }
   };
 
+  // Fetch every row of a result list, for exports that need the whole list at once
+  const fetchAllResults = async <T,>(table: ResultTable): Promise<T[]> => {
+    const total = comparison?.counts[table] || 0;
+    if (total === 0) return [];
+    const response = await window.electronAPI.queryResults<T>({ table, page_size: total });
+    if (response.error || !response.result) {
+      throw new Error(response.error || `Failed to load ${table}`);
+    }
+    return response.result.rows || [];
+  };
+
   const handleExportToPDF = async () => {
     const doc = new jsPDF();
     const pageWidth = doc.internal.pageSize.width;
@@ -281,8 +341,20 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
 
 
     if (comparison) {
+      let missingTracks: MissingTrack[] = [];
+      let newSongs: PopularSong[] = [];
+      try {
+        [missingTracks, newSongs] = await Promise.all([
+          fetchAllResults<MissingTrack>('missing_tracks'),
+          fetchAllResults<PopularSong>('new_songs'),
+        ]);
+      } catch (err) {
+        setError('Failed to load results for export');
+        return;
+      }
+
       // Missing Tracks with epic styling
-      if (comparison.missing_tracks.length > 0) {
+      if (missingTracks.length > 0) {
         if (yPosition > 220) {
           doc.addPage();
           yPosition = 30;
@@ -303,18 +375,18 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
         
         doc.setFontSize(10);
         doc.setTextColor(100, 100, 100);
-        doc.text(`${comparison.missing_tracks.length} popular tracks you might want to add`, 25, yPosition + 18);
+        doc.text(`${missingTracks.length} popular tracks you might want to add`, 25, yPosition + 18);
         
         yPosition += 35;
 
         // Group missing tracks by artist
-        const tracksByArtist = comparison.missing_tracks.reduce((acc, track) => {
+        const tracksByArtist = missingTracks.reduce((acc, track) => {
           if (!acc[track.artist]) {
             acc[track.artist] = [];
           }
           acc[track.artist].push(track);
           return acc;
-        }, {} as Record<string, typeof comparison.missing_tracks>);
+        }, {} as Record<string, MissingTrack[]>);
 
         // Sort artists alphabetically
         const sortedArtists = Object.keys(tracksByArtist).sort();
@@ -383,7 +455,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
 
 
       // New Songs with epic styling
-      if (comparison.new_songs.length > 0) {
+      if (newSongs.length > 0) {
         if (yPosition > 220) {
           doc.addPage();
           yPosition = 30;
@@ -404,18 +476,18 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
         
         doc.setFontSize(10);
         doc.setTextColor(100, 100, 100);
-        doc.text(`${comparison.new_songs.length} trending tracks to add to your collection`, 25, yPosition + 18);
+        doc.text(`${newSongs.length} trending tracks to add to your collection`, 25, yPosition + 18);
         
         yPosition += 35;
 
         // Group popular songs by artist
-        const songsByArtist = comparison.new_songs.reduce((acc, song) => {
+        const songsByArtist = newSongs.reduce((acc, song) => {
           if (!acc[song.artist]) {
             acc[song.artist] = [];
           }
           acc[song.artist].push(song);
           return acc;
-        }, {} as Record<string, typeof comparison.new_songs>);
+        }, {} as Record<string, PopularSong[]>);
 
         // Sort artists alphabetically
         const sortedSongArtists = Object.keys(songsByArtist).sort();
@@ -493,8 +565,8 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       
       // Summary boxes
       const summaryItems = [
-        { icon: 'M', label: 'Missing Tracks Found', value: comparison.missing_tracks.length, color: [220, 38, 127] },
-        { icon: 'S', label: 'Hot Singles Identified', value: comparison.new_songs.length, color: [139, 92, 246] }
+        { icon: 'M', label: 'Missing Tracks Found', value: missingTracks.length, color: [220, 38, 127] },
+        { icon: 'S', label: 'Hot Singles Identified', value: newSongs.length, color: [139, 92, 246] }
       ];
       
       summaryItems.forEach((item, index) => {
@@ -581,19 +653,48 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
   };
 
   const getTotalMissingTracks = () => {
-    return comparison?.missing_tracks.length || 0;
+    return comparison?.counts.missing_tracks || 0;
   };
 
   const getTotalNewAlbums = () => {
-    return comparison?.new_albums.length || 0;
+    return comparison?.counts.new_albums || 0;
   };
 
   const getTotalNewSongs = () => {
-    return comparison?.new_songs.length || 0;
+    return comparison?.counts.new_songs || 0;
   };
 
   const getTotalRecommendations = () => {
-    return comparison?.recommendations?.length || 0;
+    return comparison?.counts.recommendations || 0;
+  };
+
+  const renderPagination = () => {
+    if (!resultsPage) return null;
+    const totalItems = resultsPage.total_groups ?? resultsPage.total;
+    const totalPages = Math.ceil(totalItems / resultsPage.page_size);
+    if (totalPages <= 1) return null;
+
+    return (
+      <div className="flex items-center justify-center space-x-4 py-4">
+        <button
+          onClick={() => setPage(page - 1)}
+          disabled={page === 0}
+          className="interactive bg-rock-gray text-white px-4 py-2 rounded-lg hover:bg-rock-light transition-colors disabled:opacity-50"
+        >
+          Previous
+        </button>
+        <span className="text-gray-400 text-sm">
+          Page {page + 1} of {totalPages}
+        </span>
+        <button
+          onClick={() => setPage(page + 1)}
+          disabled={page + 1 >= totalPages}
+          className="interactive bg-rock-gray text-white px-4 py-2 rounded-lg hover:bg-rock-light transition-colors disabled:opacity-50"
+        >
+          Next
+        </button>
+      </div>
+    );
   };
 
   const renderOverview = () => (
@@ -623,7 +724,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       {comparison && (
         <>
           <button
-            onClick={() => setActiveTab('missing')}
+            onClick={() => selectTab('missing')}
             className="interactive music-card bg-rock-dark rounded-lg p-6 hover:bg-rock-light transition-colors text-left w-full"
           >
             <div className="flex items-center space-x-3 mb-4">
@@ -639,7 +740,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
           </button>
 
           <button
-            onClick={() => setActiveTab('albums')}
+            onClick={() => selectTab('albums')}
             className="interactive music-card bg-rock-dark rounded-lg p-6 hover:bg-rock-light transition-colors text-left w-full"
           >
             <div className="flex items-center space-x-3 mb-4">
@@ -655,7 +756,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
           </button>
 
           <button
-            onClick={() => setActiveTab('songs')}
+            onClick={() => selectTab('songs')}
             className="interactive music-card bg-rock-dark rounded-lg p-6 hover:bg-rock-light transition-colors text-left w-full"
           >
             <div className="flex items-center space-x-3 mb-4">
@@ -671,7 +772,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
           </button>
 
           <button
-            onClick={() => setActiveTab('recommendations')}
+            onClick={() => selectTab('recommendations')}
             className="interactive music-card bg-rock-dark rounded-lg p-6 hover:bg-rock-light transition-colors text-left w-full"
           >
             <div className="flex items-center space-x-3 mb-4">
@@ -710,27 +811,24 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       );
     }
 
-    // Group missing tracks by artist and album
-    const groupedTracks = comparison.missing_tracks.reduce((acc, track) => {
-      if (!acc[track.artist]) {
-        acc[track.artist] = {};
-      }
-      if (!acc[track.artist][track.album]) {
-        acc[track.artist][track.album] = [];
-      }
-      acc[track.artist][track.album].push(track.track);
-      return acc;
-    }, {} as Record<string, Record<string, string[]>>);
+    // The current page holds whole artists; only their tracks are grouped by album here
+    const artistGroups = (resultsPage?.groups || []) as ResultsGroup<MissingTrack>[];
 
     return (
       <div className="space-y-6">
-        {Object.keys(groupedTracks).length === 0 && (
+        {getTotalMissingTracks() === 0 && (
           <div className="text-center py-8">
             <p className="text-gray-400">No missing tracks found! Your collection is complete.</p>
           </div>
         )}
-        {Object.entries(groupedTracks).map(([artist, albums]) => {
-          const missingCount = Object.values(albums).reduce((sum, tracks) => sum + tracks.length, 0);
+        {artistGroups.map(({ key: artist, count: missingCount, rows }) => {
+          const albums = rows.reduce((acc, track) => {
+            if (!acc[track.album]) {
+              acc[track.album] = [];
+            }
+            acc[track.album].push(track);
+            return acc;
+          }, {} as Record<string, MissingTrack[]>);
 
           return (
             <div key={artist} className="music-card bg-rock-dark rounded-lg p-6">
@@ -747,13 +845,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
                   <div key={album} className="border-l-2 border-rock-gray pl-4">
                     <h4 className="text-lg font-medium text-rock-gold mb-2">{album}</h4>
                     <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
-                      {tracks.map((track, index) => {
-                        // Find the corresponding track data to get the year
-                        const trackData = comparison?.missing_tracks.find(t => 
-                          t.artist === artist && t.album === album && t.track === track
-                        );
-                        const year = trackData?.year;
-                        
+                      {tracks.map(({ track, year }, index) => {
                         return (
                           <button
                             key={index}
@@ -784,6 +876,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             </div>
           );
         })}
+        {renderPagination()}
       </div>
     );
   };
@@ -808,23 +901,16 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       );
     }
 
-    // Group new albums by artist
-    const groupedAlbums = comparison.new_albums.reduce((acc, album) => {
-      if (!acc[album.artist]) {
-        acc[album.artist] = [];
-      }
-      acc[album.artist].push(album);
-      return acc;
-    }, {} as Record<string, typeof comparison.new_albums>);
+    const artistGroups = (resultsPage?.groups || []) as ResultsGroup<PopularAlbum>[];
 
     return (
       <div className="space-y-6">
-        {Object.keys(groupedAlbums).length === 0 && (
+        {getTotalNewAlbums() === 0 && (
           <div className="text-center py-8">
             <p className="text-gray-400">No popular albums found. You have all the hits!</p>
           </div>
         )}
-        {Object.entries(groupedAlbums).map(([artist, albums]) => (
+        {artistGroups.map(({ key: artist, rows: albums }) => (
           <div key={artist} className="music-card bg-rock-dark rounded-lg p-6">
             <div className="flex items-center space-x-3 mb-4">
               <User className="text-green-500" size={20} />
@@ -865,6 +951,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             </div>
           </div>
         ))}
+        {renderPagination()}
       </div>
     );
   };
@@ -889,23 +976,16 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       );
     }
 
-    // Group new songs by artist
-    const groupedSongs = comparison.new_songs.reduce((acc, song) => {
-      if (!acc[song.artist]) {
-        acc[song.artist] = [];
-      }
-      acc[song.artist].push(song);
-      return acc;
-    }, {} as Record<string, typeof comparison.new_songs>);
+    const artistGroups = (resultsPage?.groups || []) as ResultsGroup<PopularSong>[];
 
     return (
       <div className="space-y-6">
-        {Object.keys(groupedSongs).length === 0 && (
+        {getTotalNewSongs() === 0 && (
           <div className="text-center py-8">
             <p className="text-gray-400">No popular songs found. You have all the hits!</p>
           </div>
         )}
-        {Object.entries(groupedSongs).map(([artist, songs]) => (
+        {artistGroups.map(({ key: artist, rows: songs }) => (
           <div key={artist} className="music-card bg-rock-dark rounded-lg p-6">
             <div className="flex items-center space-x-3 mb-4">
               <User className="text-purple-500" size={20} />
@@ -946,12 +1026,13 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             </div>
           </div>
         ))}
+        {renderPagination()}
       </div>
     );
   };
 
   const renderRecommendations = () => {
-    if (!comparison || !comparison.recommendations) {
+    if (!comparison) {
       return (
         <div className="text-center py-12">
           <User className="w-16 h-16 text-gray-500 mx-auto mb-4" />
@@ -970,15 +1051,17 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
       );
     }
 
+    const recommendations = (resultsPage?.rows || []) as ArtistRecommendation[];
+
     return (
       <div className="space-y-6">
-        {comparison.recommendations.length === 0 && (
+        {getTotalRecommendations() === 0 && (
           <div className="text-center py-8">
             <p className="text-gray-400">No artist recommendations found. Your taste is too unique!</p>
           </div>
         )}
                  <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
-           {comparison.recommendations.map((artist, index) => (
+           {recommendations.map((artist, index) => (
              <button
                key={index}
                onClick={() => handleTrackClick(artist.artist, '')}
@@ -1039,6 +1122,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             </button>
           ))}
         </div>
+        {renderPagination()}
       </div>
     );
   };
@@ -1109,6 +1193,34 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             <p className="text-red-200">{error}</p>
           </div>
         )}
+
+        {/* Budgeted or interrupted runs return a partial result; say exactly how much it covers */}
+        {comparison?.coverage && (!comparison.coverage.complete || comparison.coverage.recommendations_skipped) && (
+          <div className="bg-yellow-900/30 border border-yellow-500 rounded-lg p-3 space-y-1">
+            {!comparison.coverage.complete && (
+              <p className="text-yellow-200 text-sm">
+                ⏱️ Partial analysis: {comparison.coverage.artists_compared} of {comparison.coverage.artists_total} artists
+                ({Math.round((comparison.coverage.local_tracks_covered / Math.max(comparison.coverage.local_tracks_total, 1)) * 100)}% of your tracks)
+                {comparison.coverage.budget_exhausted
+                  ? ` compared before the ${comparison.coverage.budget_exhausted === 'api_calls' ? 'API call' : 'time'} budget ran out.`
+                  : ' compared, because Last.fm requests failed for the others.'}
+                {' '}Analyze again to continue with the remaining artists.
+              </p>
+            )}
+            {comparison.coverage.artists_failed > 0 && (
+              <p className="text-yellow-200 text-sm">
+                ⚠️ {comparison.coverage.artists_failed} artists could not be fetched from Last.fm
+                ({comparison.coverage.failed_artists.join(', ')}{comparison.coverage.artists_failed > comparison.coverage.failed_artists.length ? ', …' : ''})
+                and will be retried by the next analysis.
+              </p>
+            )}
+            {comparison.coverage.recommendations_skipped && (
+              <p className="text-yellow-200 text-sm">
+                ⏱️ Artist recommendations are incomplete because {comparison.coverage.budget_exhausted ? 'the budget ran out before all of them were fetched' : 'some Last.fm requests failed'}.
+              </p>
+            )}
+          </div>
+        )}
       </div>
 
       {loading && (
@@ -1156,7 +1268,7 @@ const Dashboard: React.FC<DashboardProps> = ({ scanResult, onAnalyze, hasScanned
             ].map((tab) => (
               <button
                 key={tab.key}
-                onClick={() => setActiveTab(tab.key as any)}
+                onClick={() => selectTab(tab.key as any)}
                 className={`interactive px-4 py-2 border-b-2 transition-colors ${
                   activeTab === tab.key
                     ? 'border-rock-accent text-rock-accent'
@@ -99,6 +99,23 @@ const SettingsModal: React.FC<SettingsModalProps> = ({ isOpen, onClose, onSave }
                   className="interactive w-full bg-rock-gray border border-rock-light rounded-lg px-4 py-3 text-white placeholder-gray-400 focus:border-rock-accent focus:outline-none"
                 />
               </div>
+
+              <div>
+                <label className="block text-sm font-medium text-gray-300 mb-2">
+                  Analysis Time Budget in Minutes (Optional)
+                </label>
+                <input
+                  type="number"
+                  min={1}
+                  value={settings.compareBudgetMinutes ?? ''}
+                  onChange={(e) => setSettings({ ...settings, compareBudgetMinutes: e.target.value ? Number(e.target.value) : undefined })}
+                  placeholder="No limit"
+                  className="interactive w-full bg-rock-gray border border-rock-light rounded-lg px-4 py-3 text-white placeholder-gray-400 focus:border-rock-accent focus:outline-none"
+                />
+                <p className="text-xs text-gray-400 mt-2">
+                  Large collections: analyze your most important artists first and stop after this long. Run the analysis again to continue.
+                </p>
+              </div>
             </div>
 
             <div className="bg-rock-gray/50 rounded-lg p-4 space-y-3">
@@ -3,6 +3,7 @@ export interface Track {
   album: string;
   track: string;
   file?: string;
+  modified?: number;
 }
 
 export interface ScanResult {
@@ -12,40 +13,116 @@ export interface ScanResult {
   albumCount: number;
 }
 
+export interface MissingTrack {
+  artist: string;
+  album: string;
+  track: string;
+  playcount?: number;
+  year?: number;
+}
+
+export interface PopularAlbum {
+  artist: string;
+  album: string;
+  playcount: number;
+  year?: number;
+}
+
+export interface PopularSong {
+  artist: string;
+  track: string;
+  playcount: number;
+  year?: number;
+}
+
+export interface ArtistRecommendation {
+  artist: string;
+  similarity: number;
+  listeners: number;
+  playcount: number;
+  tags: string[];
+  image?: string;
+}
+
+// Full result printed by lastfm_compare.py without --db, and written per library by --batch --output-dir
 export interface LastFMComparison {
-  missing_tracks: {
-    artist: string;
-    album: string;
-    track: string;
-    year?: number;
-  }[];
-  new_albums: {
-    artist: string;
-    album: string;
-    playcount: number;
-    year?: number;
-  }[];
-  new_songs: {
-    artist: string;
-    track: string;
-    playcount: number;
-    year?: number;
-  }[];
-  recommendations?: {
-    artist: string;
-    similarity: number;
-    listeners: number;
-    playcount: number;
-    tags: string[];
-    image?: string;
-  }[];
+  missing_tracks: MissingTrack[];
+  new_albums: PopularAlbum[];
+  new_songs: PopularSong[];
+  recommendations?: ArtistRecommendation[];
   total_local_tracks: number;
   total_artists: number;
+  coverage?: CompareCoverage;
+}
+
+// How much of the collection a (possibly budgeted) comparison actually covered
+export interface CompareCoverage {
+  complete: boolean;
+  budget_exhausted: 'time' | 'api_calls' | null;
+  recommendations_skipped: boolean;
+  artists_total: number;
+  artists_compared: number;
+  // Artists whose Last.fm requests failed; they are retried by the next analysis
+  artists_failed: number;
+  local_tracks_total: number;
+  local_tracks_covered: number;
+  api_calls: number;
+  elapsed_seconds: number;
+  next_artists: string[];
+  failed_artists: string[];
+}
+
+export type ResultTable = 'missing_tracks' | 'new_albums' | 'new_songs' | 'recommendations';
+
+// What compareWithLastFM returns; the rows themselves are fetched with queryResults
+export interface ComparisonSummary {
+  counts: Record<ResultTable, number>;
+  total_local_tracks: number;
+  total_artists: number;
+  coverage?: CompareCoverage;
+}
+
+export interface ResultsQuery {
+  table: ResultTable;
+  filter?: {
+    artist?: string;
+    album?: string;
+    search?: string;
+    year_from?: number;
+    year_to?: number;
+    min_playcount?: number;
+  };
+  sort?: string;
+  order?: 'asc' | 'desc';
+  group_by?: 'artist';
+  page?: number;
+  page_size?: number;
+}
+
+export interface ResultsGroup<T> {
+  key: string;
+  count: number;
+  rows: T[];
+}
+
+// Either rows (plain query) or groups (query with group_by) are set
+export interface ResultsPage<T> {
+  rows?: T[];
+  groups?: ResultsGroup<T>[];
+  total: number;
+  total_groups?: number;
+  page: number;
+  page_size: number;
 }
 
 export interface Settings {
   lastfmApiKey?: string;
   lastfmSecret?: string;
+  compareBudgetMinutes?: number;
+}
+
+export interface CompareOptions {
+  budgetMinutes?: number;
 }
 
 export interface ElectronAPI {
@@ -55,11 +132,15 @@ export interface ElectronAPI {
     error?: string;
     raw?: string;
   }>;
-  compareWithLastFM: (scanResult: Track[], apiKey?: string) => Promise<{
-    result?: LastFMComparison;
+  compareWithLastFM: (scanResult: Track[], apiKey?: string, options?: CompareOptions) => Promise<{
+    result?: ComparisonSummary;
     error?: string;
     raw?: string;
   }>;
+  queryResults: <T>(query: ResultsQuery) => Promise<{
+    result?: ResultsPage<T>;
+    error?: string;
+  }>;
   getSettings: () => Promise<{
     result?: Settings;
     error?: string;